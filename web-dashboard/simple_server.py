@@ -6,8 +6,9 @@ Homeboi Web Dashboard - Simple web interface for managing Homeboi services
 import os
 import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, urlparse
 from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 import re
@@ -61,10 +62,15 @@ def _http_json(url: str, headers: dict | None = None, timeout: float = 3.0):
         data = resp.read()
         return json.loads(data.decode("utf-8", errors="ignore"))
 
-def _container_http_base(name: str, port: int) -> str | None:
+def _container_http_base(name: str, port: int, containers: dict | None = None) -> str | None:
     try:
-        client = docker.from_env()
-        container = client.containers.get(name)
+        if containers is not None:
+            container = containers.get(name)
+            if container is None:
+                return None
+        else:
+            client = docker.from_env()
+            container = client.containers.get(name)
         networks = (container.attrs.get("NetworkSettings", {}).get("Networks") or {}).values()
         for net in networks:
             ip = (net or {}).get("IPAddress")
@@ -74,19 +80,170 @@ def _container_http_base(name: str, port: int) -> str | None:
         return None
     return None
 
-def _best_base(name: str, port: int, fallback_host: str) -> str:
-    return _container_http_base(name, port) or f"http://{fallback_host}:{port}"
+def _best_base(name: str, port: int, fallback_host: str, containers: dict | None = None) -> str:
+    return _container_http_base(name, port, containers) or f"http://{fallback_host}:{port}"
+
+DASHBOARD_FIELDS = ("status", "setup")
+
+# Containers whose IPs the setup checks resolve.
+SETUP_CONTAINERS = ("jellyfin", "plex", "overseerr", "jellyseerr", "sonarr", "radarr", "prowlarr", "gluetun")
+
+# Upper bound (seconds) on all setup probes together in /api/dashboard, so one slow
+# service cannot hold back the status grid that shares the response. Kept well above
+# the 3 s per-request timeout so a service that is merely slow still finishes.
+SETUP_PROBE_BUDGET = 8.0
+
+# Shared by every setup collection so probes left running past the budget cannot
+# pile up a new pool of threads on each refresh.
+_SETUP_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+def _list_containers(names: list[str] | None = None) -> dict:
+    client = docker.from_env()
+    if names is None:
+        return {c.name: c for c in client.containers.list(all=True)}
+    # One filtered listing so only the requested containers are inspected, not the whole host.
+    # The name filter is a regex over "/<name>"; exact names are matched again below.
+    wanted = set(names)
+    patterns = [f"^/{re.escape(name)}$" for name in wanted]
+    listed = client.containers.list(all=True, filters={"name": patterns})
+    return {c.name: c for c in listed if c.name in wanted}
+
+def _split_param(query: dict, key: str) -> list[str]:
+    values: list[str] = []
+    for raw in query.get(key, []):
+        values.extend(v.strip() for v in raw.split(",") if v.strip())
+    return values
+
+def _collect_status(containers: dict, services: list[str] | None = None) -> dict:
+    if services:
+        return {name: (name in containers and containers[name].status == 'running') for name in services}
+    return {name: container.status == 'running' for name, container in containers.items()}
+
+def _collect_setup(containers: dict | None = None, budget: float | None = None) -> dict:
+    """
+    Best-effort setup checklist status, shared by /api/setup and /api/dashboard.
+    Container IPs come from `containers` when given, otherwise each service is looked up
+    individually. Probes run in parallel; with a `budget` (seconds), any still pending
+    when it runs out report "reachable": None (unknown) rather than unreachable.
+    """
+    result = {
+        "preferences": {
+            "primaryMediaServer": "jellyfin",
+            "primaryRequestApp": "jellyseerr",
+        },
+        "plex": {"reachable": False, "claimed": None},
+        "jellyfin": {"reachable": False, "startupWizardCompleted": None},
+        "sonarr": {"reachable": False, "hasSabnzbd": None},
+        "radarr": {"reachable": False, "hasSabnzbd": None},
+        "prowlarr": {"reachable": False, "applicationsConfigured": None, "hasIndexers": None},
+        "overseerr": {"reachable": False, "initialized": None},
+        "jellyseerr": {"reachable": False, "initialized": None},
+    }
+
+    # Single source of truth: Homeboi root is mounted at /homeboi.
+    homeboi_root = "/homeboi"
+    env = _parse_env(_read_file(os.path.join(homeboi_root, "settings.env")))
+    primary_media = (env.get("PRIMARY_MEDIA_SERVER") or "").strip().lower() or "jellyfin"
+    primary_request = (env.get("PRIMARY_REQUEST_APP") or "").strip().lower() or "jellyseerr"
+    if primary_media in ("jellyfin", "plex"):
+        result["preferences"]["primaryMediaServer"] = primary_media
+    if primary_request in ("jellyseerr", "overseerr"):
+        result["preferences"]["primaryRequestApp"] = primary_request
+
+    jellyfin_base = _best_base("jellyfin", 8096, "jellyfin", containers)
+    plex_base = _best_base("plex", 32400, "plex", containers)
+    overseerr_base = _best_base("overseerr", 5055, "overseerr", containers)
+    jellyseerr_base = _best_base("jellyseerr", 5056, "jellyseerr", containers)
+    sonarr_base = _best_base("sonarr", 8989, "sonarr", containers)
+    radarr_base = _best_base("radarr", 7878, "radarr", containers)
+    prowlarr_base = _container_http_base("prowlarr", 9696, containers) or _best_base("gluetun", 9696, "gluetun", containers) or "http://prowlarr:9696"
+
+    # API key based checks: read keys from mounted Homeboi configs (no logging)
+    sonarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/sonarr/config.xml")), "ApiKey")
+    radarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/radarr/config.xml")), "ApiKey")
+    prowlarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/prowlarr/config.xml")), "ApiKey")
+
+    # Each probe returns (service, updates); updates are applied on this thread only.
+    def plex_identity():
+        # Plex identity (no key)
+        req = Request(f"{plex_base}/identity")
+        with urlopen(req, timeout=3.0) as resp:
+            identity_xml = resp.read().decode("utf-8", errors="ignore")
+        claimed = _extract_xml_attr(identity_xml, "claimed")
+        updates = {"reachable": True}
+        if claimed in ("0", "1"):
+            updates["claimed"] = (claimed == "1")
+        return "plex", updates
+
+    def jellyfin_info():
+        # Jellyfin public info (no key)
+        jf = _http_json(f"{jellyfin_base}/System/Info/Public")
+        return "jellyfin", {"reachable": True, "startupWizardCompleted": bool(jf.get("StartupWizardCompleted"))}
+
+    def request_app_settings(name, base):
+        # Request apps public settings (no key)
+        settings = _http_json(f"{base}/api/v1/settings/public")
+        return name, {"reachable": True, "initialized": bool(settings.get("initialized"))}
+
+    def arr_download_clients(name, base, key):
+        clients = _http_json(f"{base}/api/v3/downloadclient", headers={"X-Api-Key": key})
+        return name, {"reachable": True, "hasSabnzbd": any(c.get("name") == "SABnzbd" for c in (clients or []))}
+
+    def prowlarr_applications():
+        apps = _http_json(f"{prowlarr_base}/api/v1/applications", headers={"X-Api-Key": prowlarr_key})
+        names = {a.get("name") for a in (apps or [])}
+        return "prowlarr", {"reachable": True, "applicationsConfigured": ("Sonarr" in names and "Radarr" in names)}
+
+    def prowlarr_indexers():
+        indexers = _http_json(f"{prowlarr_base}/api/v1/indexer", headers={"X-Api-Key": prowlarr_key})
+        return "prowlarr", {"reachable": True, "hasIndexers": bool(indexers)}
+
+    # (service, probe, *args)
+    probes = [
+        ("plex", plex_identity),
+        ("jellyfin", jellyfin_info),
+        ("overseerr", request_app_settings, "overseerr", overseerr_base),
+        ("jellyseerr", request_app_settings, "jellyseerr", jellyseerr_base),
+    ]
+    if sonarr_key:
+        probes.append(("sonarr", arr_download_clients, "sonarr", sonarr_base, sonarr_key))
+    if radarr_key:
+        probes.append(("radarr", arr_download_clients, "radarr", radarr_base, radarr_key))
+    if prowlarr_key:
+        probes.append(("prowlarr", prowlarr_applications))
+        probes.append(("prowlarr", prowlarr_indexers))
+
+    futures = {_SETUP_EXECUTOR.submit(*probe[1:]): probe[0] for probe in probes}
+    done, pending = wait(futures, timeout=budget)
+    for future in done:
+        try:
+            service, updates = future.result()
+        except Exception:
+            # Best-effort: an unreachable or misbehaving service just stays unchecked.
+            continue
+        result[service].update(updates)
+    # Stragglers keep running on the shared executor; urlopen's timeout is per socket
+    # operation, so a slow-dripping service can hold a worker well past 3 s.
+    for future in pending:
+        service = futures[future]
+        if result[service]["reachable"] is False:
+            result[service]["reachable"] = None
+
+    return result
 
 class HomeBoiHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == '/':
+        parsed = urlparse(self.path)
+        if parsed.path == '/':
             self.serve_dashboard()
-        elif self.path == '/api/status':
+        elif parsed.path == '/api/status':
             self.serve_api_status()
-        elif self.path == '/api/setup':
+        elif parsed.path == '/api/setup':
             self.serve_api_setup()
-        elif self.path.startswith('/api/logs/'):
-            service = self.path.split('/')[-1]
+        elif parsed.path == '/api/dashboard':
+            self.serve_api_dashboard(parse_qs(parsed.query))
+        elif parsed.path.startswith('/api/logs/'):
+            service = parsed.path.split('/')[-1]
             self.serve_logs(service)
         else:
             self.send_error(404)
@@ -311,11 +468,8 @@ class HomeBoiHandler(BaseHTTPRequestHandler):
             return order.map(k => byName[k]).filter(Boolean);
         }
 
-        async function loadServices() {
+        function renderServices(data) {
             try {
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                
                 const container = document.getElementById('services');
                 container.innerHTML = '';
                 
@@ -350,11 +504,9 @@ class HomeBoiHandler(BaseHTTPRequestHandler):
             return `<li class="${cls}">${html}</li>`;
         }
 
-        async function loadSetup() {
+        function renderSetup(data) {
             const container = document.getElementById('setup');
             try {
-                const response = await fetch('/api/setup');
-                const data = await response.json();
                 preferences = data.preferences || preferences;
 
                 const items = [];
@@ -457,10 +609,30 @@ class HomeBoiHandler(BaseHTTPRequestHandler):
             }
         }
 
-        loadSetup();
-        loadServices();
-        setInterval(loadServices, 30000); // Refresh every 30 seconds
-        setInterval(loadSetup, 30000);
+        async function loadDashboard() {
+            // One request for both sections, limited to the services the grid renders.
+            const names = services.map(s => s.name.toLowerCase()).join(',');
+            try {
+                const response = await fetch(`/api/dashboard?fields=status,setup&services=${names}`);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || response.statusText);
+                }
+                // Each section renders on its own, so a failed container lookup keeps the checklist.
+                renderSetup(data.setup || {});
+                if (data.errors?.status) {
+                    document.getElementById('services').innerHTML = 'Error loading services';
+                } else {
+                    renderServices(data.status || {});
+                }
+            } catch (error) {
+                document.getElementById('setup').innerHTML = li('muted', 'Error loading setup status.');
+                document.getElementById('services').innerHTML = 'Error loading services';
+            }
+        }
+
+        loadDashboard();
+        setInterval(loadDashboard, 30000); // Refresh every 30 seconds
     </script>
 </body>
 </html>"""
@@ -472,13 +644,7 @@ class HomeBoiHandler(BaseHTTPRequestHandler):
 
     def serve_api_status(self):
         try:
-            client = docker.from_env()
-            containers = client.containers.list(all=True)
-            
-            status = {}
-            for container in containers:
-                name = container.name
-                status[name] = container.status == 'running'
+            status = _collect_status(_list_containers())
             
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -495,111 +661,51 @@ class HomeBoiHandler(BaseHTTPRequestHandler):
         """
         Best-effort setup checklist status. Keep this endpoint unauthenticated and avoid secrets.
         """
-        result = {
-            "preferences": {
-                "primaryMediaServer": "jellyfin",
-                "primaryRequestApp": "jellyseerr",
-            },
-            "plex": {"reachable": False, "claimed": None},
-            "jellyfin": {"reachable": False, "startupWizardCompleted": None},
-            "sonarr": {"reachable": False, "hasSabnzbd": None},
-            "radarr": {"reachable": False, "hasSabnzbd": None},
-            "prowlarr": {"reachable": False, "applicationsConfigured": None, "hasIndexers": None},
-            "overseerr": {"reachable": False, "initialized": None},
-            "jellyseerr": {"reachable": False, "initialized": None},
-        }
+        result = _collect_setup()
 
-        # Single source of truth: Homeboi root is mounted at /homeboi.
-        homeboi_root = "/homeboi"
-        env = _parse_env(_read_file(os.path.join(homeboi_root, "settings.env")))
-        primary_media = (env.get("PRIMARY_MEDIA_SERVER") or "").strip().lower() or "jellyfin"
-        primary_request = (env.get("PRIMARY_REQUEST_APP") or "").strip().lower() or "jellyseerr"
-        if primary_media in ("jellyfin", "plex"):
-            result["preferences"]["primaryMediaServer"] = primary_media
-        if primary_request in ("jellyseerr", "overseerr"):
-            result["preferences"]["primaryRequestApp"] = primary_request
-
-        jellyfin_base = _best_base("jellyfin", 8096, "jellyfin")
-        plex_base = _best_base("plex", 32400, "plex")
-        overseerr_base = _best_base("overseerr", 5055, "overseerr")
-        jellyseerr_base = _best_base("jellyseerr", 5056, "jellyseerr")
-        sonarr_base = _best_base("sonarr", 8989, "sonarr")
-        radarr_base = _best_base("radarr", 7878, "radarr")
-        prowlarr_base = _container_http_base("prowlarr", 9696) or _best_base("gluetun", 9696, "gluetun") or "http://prowlarr:9696"
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(result).encode())
 
-        # Plex identity (no key)
-        try:
-            req = Request(f"{plex_base}/identity")
-            with urlopen(req, timeout=3.0) as resp:
-                identity_xml = resp.read().decode("utf-8", errors="ignore")
-            claimed = _extract_xml_attr(identity_xml, "claimed")
-            result["plex"]["reachable"] = True
-            if claimed in ("0", "1"):
-                result["plex"]["claimed"] = (claimed == "1")
-        except (URLError, HTTPError, ValueError):
-            pass
+    def serve_api_dashboard(self, query: dict):
+        """
+        Status + setup in one response, built from a single container listing
+        (name-filtered to the requested services plus SETUP_CONTAINERS when ?services= is given).
+        Supports ?fields=status,setup and ?services=jellyfin,sonarr,... to trim the payload.
+        A failed container lookup is reported under "errors" so the other sections still render.
+        """
+        fields = [f.lower() for f in _split_param(query, "fields")] or list(DASHBOARD_FIELDS)
+        unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+        if unknown:
+            self.send_response(400)
+            self.send_header("Content-type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": f"unknown fields: {', '.join(unknown)}"}).encode())
+            return
+        # Container names are case-sensitive, so service names pass through unchanged.
+        services = _split_param(query, "services")
 
-        # Jellyfin public info (no key)
-        try:
-            jf = _http_json(f"{jellyfin_base}/System/Info/Public")
-            result["jellyfin"]["reachable"] = True
-            result["jellyfin"]["startupWizardCompleted"] = bool(jf.get("StartupWizardCompleted"))
-        except (URLError, HTTPError, ValueError):
-            pass
+        # Full host listing only when the caller wants every container's status.
+        names = None
+        if services or "status" not in fields:
+            names = (services if "status" in fields else []) + (list(SETUP_CONTAINERS) if "setup" in fields else [])
 
-        # Request apps public settings (no key)
+        errors = {}
         try:
-            osr = _http_json(f"{overseerr_base}/api/v1/settings/public")
-            result["overseerr"]["reachable"] = True
-            result["overseerr"]["initialized"] = bool(osr.get("initialized"))
-        except (URLError, HTTPError, ValueError):
-            pass
-        try:
-            jsr = _http_json(f"{jellyseerr_base}/api/v1/settings/public")
-            result["jellyseerr"]["reachable"] = True
-            result["jellyseerr"]["initialized"] = bool(jsr.get("initialized"))
-        except (URLError, HTTPError, ValueError):
-            pass
-
-        # API key based checks: read keys from mounted Homeboi configs (no logging)
-        sonarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/sonarr/config.xml")), "ApiKey")
-        radarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/radarr/config.xml")), "ApiKey")
-        prowlarr_key = _extract_xml_tag(_read_file(os.path.join(homeboi_root, "configs/prowlarr/config.xml")), "ApiKey")
-
-        if sonarr_key:
-            try:
-                headers = {"X-Api-Key": sonarr_key}
-                clients = _http_json(f"{sonarr_base}/api/v3/downloadclient", headers=headers)
-                result["sonarr"]["reachable"] = True
-                result["sonarr"]["hasSabnzbd"] = any(c.get("name") == "SABnzbd" for c in (clients or []))
-            except (URLError, HTTPError, ValueError):
-                pass
-
-        if radarr_key:
-            try:
-                headers = {"X-Api-Key": radarr_key}
-                clients = _http_json(f"{radarr_base}/api/v3/downloadclient", headers=headers)
-                result["radarr"]["reachable"] = True
-                result["radarr"]["hasSabnzbd"] = any(c.get("name") == "SABnzbd" for c in (clients or []))
-            except (URLError, HTTPError, ValueError):
-                pass
-
-        if prowlarr_key:
-            try:
-                headers = {"X-Api-Key": prowlarr_key}
-                apps = _http_json(f"{prowlarr_base}/api/v1/applications", headers=headers)
-                result["prowlarr"]["reachable"] = True
-                names = {a.get("name") for a in (apps or [])}
-                result["prowlarr"]["applicationsConfigured"] = ("Sonarr" in names and "Radarr" in names)
-            except (URLError, HTTPError, ValueError):
-                pass
-            try:
-                headers = {"X-Api-Key": prowlarr_key}
-                indexers = _http_json(f"{prowlarr_base}/api/v1/indexer", headers=headers)
-                result["prowlarr"]["reachable"] = True
-                result["prowlarr"]["hasIndexers"] = bool(indexers)
-            except (URLError, HTTPError, ValueError):
-                pass
+            containers = _list_containers(names)
+        except Exception as e:
+            containers = {}
+            if "status" in fields:
+                errors["status"] = str(e)
+
+        result = {}
+        if "status" in fields and "status" not in errors:
+            result["status"] = _collect_status(containers, services)
+        if "setup" in fields:
+            result["setup"] = _collect_setup(containers, budget=SETUP_PROBE_BUDGET)
+        if errors:
+            result["errors"] = errors
 
         self.send_response(200)
         self.send_header("Content-type", "application/json")